@@ -2,39 +2,78 @@ from __future__ import annotations
 
 import os
 from typing import Any, Dict, List
-from pathlib import Path
 
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from langchain_openai import ChatOpenAI
+from langchain_community.chat_message_histories import SQLChatMessageHistory
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_community.chat_message_histories import FileChatMessageHistory
 from langchain_classic.agents import create_tool_calling_agent, AgentExecutor
 
+from planner import build_parallel_agent
 from rule_store import RuleStore
 from tools import build_tools
 
 
+HISTORY_DB_PATH = "chat_histories.db"
+
+
+def _set_sqlite_pragma(dbapi_connection, connection_record) -> None:
+    # WAL: 여러 세션의 동시 읽기/쓰기 허용, synchronous=NORMAL: 커밋마다의 fsync를 줄인다
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def _create_history_engine() -> AsyncEngine:
+    """
+    모든 세션이 공유하는 SQLite 엔진을 만든다.
+    - 에이전트를 ainvoke/astream_events로 실행하므로 비동기 드라이버(aiosqlite)를 사용한다.
+    - 여러 세션이 처음 동시에 접근할 때 CREATE TABLE이 경합하지 않도록 테이블은 시작 시 동기 엔진으로 1번만 만든다.
+    """
+    init_engine = create_engine(f"sqlite:///{HISTORY_DB_PATH}")
+    event.listen(init_engine, "connect", _set_sqlite_pragma)
+    SQLChatMessageHistory(session_id="", connection=init_engine)
+    init_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{HISTORY_DB_PATH}")
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragma)
+    return engine
+
+
+history_engine = _create_history_engine()
+
+SYSTEM_PROMPT = (
+    "당신은 [서강대학교 러너톤] AI Code Rule Checker 에이전트이다.\n"
+    "목표: 팀의 코딩 규칙을 대신 기억하고, 규칙을 설명하며, 코드를 받으면 위반을 찾고 고치는 것이다.\n"
+    "도구 사용 원칙:\n"
+    "1) 사용자가 규칙 목록/설명을 요구하면 list_rules 또는 search_rules를 사용한다.\n"
+    "2) 사용자가 코드를 주거나 '체크/검사/고쳐' 요청을 하면 check_code를 사용한다.\n"
+    "3) 사용자가 새 규칙을 추가하라고 하면 add_rule을 사용하고, 이후 필요 시 rebuild_rules_index를 호출한다.\n"
+    "출력은 사람이 읽기 쉽게 작성하되, 위반이 있으면 라인 범위/수정 제안/가능하면 diff를 포함한다.\n"
+    "규칙/검사 결과를 임의로 만들어내지 말고, 도구 출력에 근거하여 답한다."
+)
+# 고정된 system 메시지는 import 시 1번만 만든다(턴마다 템플릿 문자열을 다시 포맷하지 않는다)
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
+
 def build_agent(rule_store: RuleStore) -> RunnableWithMessageHistory:
     """
-    Tool Calling Agent + 세션별 히스토리(persisted file) 구성.
+    Tool Calling Agent + 세션별 히스토리(SQLite, SQLChatMessageHistory) 구성.
     - 교안의 구조: system + chat_history + human(input) + agent_scratchpad 구성.
     - AgentExecutor에서 max_iterations, max_execution_time, handle_parsing_errors를 적용한다.
+    - AGENT_MODE=parallel(기본)이면 planner가 도구 호출 DAG를 만들고 독립 도구를 동시에 실행한다.
+      계획 수립에 실패하거나 AGENT_MODE=react이면 AgentExecutor를 그대로 사용한다.
+    - 히스토리가 비동기 엔진(aiosqlite)을 사용하므로 반환된 에이전트는 ainvoke/astream_events로만 실행한다.
+      동기 invoke는 SQLChatMessageHistory에서 실패한다.
     """
     tools = build_tools(rule_store)
 
-    system_msg = (
-        "당신은 [서강대학교 러너톤] AI Code Rule Checker 에이전트이다.\n"
-        "목표: 팀의 코딩 규칙을 대신 기억하고, 규칙을 설명하며, 코드를 받으면 위반을 찾고 고치는 것이다.\n"
-        "도구 사용 원칙:\n"
-        "1) 사용자가 규칙 목록/설명을 요구하면 list_rules 또는 search_rules를 사용한다.\n"
-        "2) 사용자가 코드를 주거나 '체크/검사/고쳐' 요청을 하면 check_code를 사용한다.\n"
-        "3) 사용자가 새 규칙을 추가하라고 하면 add_rule을 사용하고, 이후 필요 시 rebuild_rules_index를 호출한다.\n"
-        "출력은 사람이 읽기 쉽게 작성하되, 위반이 있으면 라인 범위/수정 제안/가능하면 diff를 포함한다.\n"
-        "규칙/검사 결과를 임의로 만들어내지 말고, 도구 출력에 근거하여 답한다."
-    )
-
     prompt = ChatPromptTemplate.from_messages([
-        ("system", system_msg),
+        SYSTEM_MESSAGE,
         MessagesPlaceholder(variable_name="chat_history"),
         ("human", "{input}"),
         MessagesPlaceholder(variable_name="agent_scratchpad"),
@@ -56,12 +95,22 @@ def build_agent(rule_store: RuleStore) -> RunnableWithMessageHistory:
         handle_parsing_errors=True,
     )
 
+    runnable = executor
+    if os.getenv("AGENT_MODE", "parallel") == "parallel":
+        runnable = build_parallel_agent(
+            llm,
+            tools,
+            SYSTEM_MESSAGE,
+            fallback=executor,
+            max_execution_time=max_time,
+        )
+
     def get_history(session_id: str):
-        Path("chat_histories").mkdir(exist_ok=True)
-        return FileChatMessageHistory(f"chat_histories/{session_id}.json")
+        # 메시지 테이블은 시작 시 만들어 두었으므로, 세션 객체는 턴마다 만들고 보관하지 않는다(엔진만 공유한다)
+        return SQLChatMessageHistory(session_id=session_id, connection=history_engine)
 
     return RunnableWithMessageHistory(
-        executor,
+        runnable,
         get_history,
         input_messages_key="input",
         history_messages_key="chat_history",
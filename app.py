@@ -1,28 +1,27 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Optional, Literal, Any, Dict, List
+from typing import Literal, Any, Dict, List
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
-from rule_store import RuleStore
+from rule_store import RuleStore, stable_short_hash
 from schemas import RuleCheckResult, AgentResponse
-from rule_engine import (
-    check_import_alphabetical,
-    check_no_wildcard_import,
-    fix_trailing_whitespace,
-    check_line_length,
-)
+from rule_engine import run_all_rules
 from schemas import Violation
 from agent import build_agent
+from planner import PLANNER_TAG
 
 
 load_dotenv()
+# LangChain 콜백(tracing 등)을 응답 경로에서 분리하여 백그라운드에서 실행한다
+os.environ.setdefault("LANGCHAIN_CALLBACKS_BACKGROUND", "true")
 
 app = FastAPI(title="[Sogang Runnerthon] AI Code Rule Checker (Agentic)")
 
@@ -73,7 +72,7 @@ class AddRuleRequest(BaseModel):
 @app.post("/rules")
 def add_rule(req: AddRuleRequest):
     # 단순 API 추가(에이전트 도구(add_rule)와 동일 목적)
-    rid = f"RULE-{abs(hash(req.title)) % 10000:04d}"
+    rid = f"RULE-{stable_short_hash(req.title)}"
     rule = {
         "id": rid,
         "language": req.language.lower(),
@@ -88,125 +87,93 @@ def add_rule(req: AddRuleRequest):
 @app.post("/check", response_model=RuleCheckResult)
 def check(req: CheckRequest):
     # deterministic checker만으로도 동작하는 REST 엔드포인트 유지
-    original = req.code
-    code = req.code
-    violations: List[Violation] = []
-    fixed_code: Optional[str] = None
-
-    v1, f1 = check_import_alphabetical(code)
-    for v in v1:
-        violations.append(
-            Violation(
-                rule_id=v.rule_id,
-                title=v.title,
-                severity="warning",
-                message=v.message,
-                start_line=v.start_line,
-                end_line=v.end_line,
-                suggestion=v.suggestion,
-            )
-        )
-    if req.auto_fix and f1:
-        code = f1
-        fixed_code = code
-
-    v2, f2 = fix_trailing_whitespace(code)
-    for v in v2:
-        violations.append(
-            Violation(
-                rule_id=v.rule_id,
-                title=v.title,
-                severity="warning",
-                message=v.message,
-                start_line=v.start_line,
-                end_line=v.end_line,
-                suggestion=v.suggestion,
-            )
-        )
-    if req.auto_fix and f2:
-        code = f2
-        fixed_code = code
-
-    for v in check_no_wildcard_import(code):
-        violations.append(
-            Violation(
-                rule_id=v.rule_id,
-                title=v.title,
-                severity="error",
-                message=v.message,
-                start_line=v.start_line,
-                end_line=v.end_line,
-                suggestion=v.suggestion,
-            )
-        )
-
-    for v in check_line_length(code, limit=88):
-        violations.append(
-            Violation(
-                rule_id=v.rule_id,
-                title=v.title,
-                severity="info",
-                message=v.message,
-                start_line=v.start_line,
-                end_line=v.end_line,
-                suggestion=v.suggestion,
-            )
+    outcome = run_all_rules(req.code, auto_fix=req.auto_fix, include_diff=req.include_diff, limit=88)
+    violations = [
+        Violation(
+            rule_id=v.rule_id,
+            title=v.title,
+            severity=v.severity,
+            message=v.message,
+            start_line=v.start_line,
+            end_line=v.end_line,
+            suggestion=v.suggestion,
         )
+        for v in outcome.violations
+    ]
 
     ok = (len(violations) == 0)
     summary = "규칙 위반이 없다." if ok else f"규칙 위반 {len(violations)}건이 발견되었다."
 
-    unified_diff = None
-    if req.include_diff and fixed_code and fixed_code != original:
-        import difflib
-        diff = difflib.unified_diff(
-            original.splitlines(True),
-            fixed_code.splitlines(True),
-            fromfile="before.py",
-            tofile="after.py",
-        )
-        unified_diff = "".join(diff)
-
     return RuleCheckResult(
         ok=ok,
         summary=summary,
         violations=violations,
-        fixed_code=fixed_code if (req.auto_fix and fixed_code) else None,
-        unified_diff=unified_diff,
+        fixed_code=outcome.fixed_code,
+        unified_diff=outcome.unified_diff,
         notes="deterministic checker만 사용한다.",
     )
 
 
-@app.post("/agent", response_model=AgentResponse)
-def agent(req: AgentRequest):
+def _sse(event: str, data: str) -> str:
+    # data는 JSON 문자열로 보내므로 줄바꿈이 포함되지 않는다
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def _summarize_steps(steps: List[Any]) -> List[Dict[str, Any]]:
+    # debug: intermediate_steps를 노출하면 너무 길어질 수 있으므로 요약만 제공
+    summarized = []
+    for action, observation in steps:
+        summarized.append(
+            {
+                "tool": getattr(action, "tool", None),
+                "tool_input": getattr(action, "tool_input", None),
+                "observation_preview": str(observation)[:300],
+            }
+        )
+    return summarized
+
+
+async def _agent_events(req: AgentRequest):
+    result: Dict[str, Any] = {}
+    try:
+        async for ev in agent_with_history.astream_events(
+            {"input": req.input},
+            config={"configurable": {"session_id": req.session_id}},
+            version="v2",
+        ):
+            if ev["event"] == "on_chat_model_stream":
+                # planner의 계획(JSON) 토큰은 사용자 응답이 아니므로 제외한다
+                if PLANNER_TAG in ev.get("tags", []):
+                    continue
+                content = ev["data"]["chunk"].content
+                if isinstance(content, str) and content:
+                    yield _sse("token", json.dumps({"content": content}, ensure_ascii=False))
+            elif ev["event"] == "on_chain_end" and not ev.get("parent_ids"):
+                # 최상위 실행 종료: AgentExecutor와 동일한 dict 반환 {"output": "...", ...}
+                output = ev["data"].get("output")
+                if isinstance(output, dict):
+                    result = output
+    except Exception as e:
+        yield _sse("error", json.dumps({"message": str(e)}, ensure_ascii=False))
+        return
+
+    tool_summary = _summarize_steps(result.get("intermediate_steps", [])) if req.debug else None
+    final = AgentResponse(output=result.get("output", str(result)), tool_summary=tool_summary)
+    yield _sse("final", final.model_dump_json())
+
+
+@app.post("/agent")
+async def agent(req: AgentRequest):
     """
     단일 입력으로:
     - 규칙 설명/검색
     - 코드 검사/수정
     - 규칙 추가
     등을 에이전트가 판단하여 수행한다.
-    """
-    # AgentExecutor는 dict 반환: {"output": "...", ...}
-    result = agent_with_history.invoke(
-        {"input": req.input},
-        config={"configurable": {"session_id": req.session_id}},
-    )
 
-    output = result.get("output", str(result))
-
-    # debug: intermediate_steps를 노출하면 너무 길어질 수 있으므로 요약만 제공
-    tool_summary = None
-    if req.debug:
-        steps = result.get("intermediate_steps", [])
-        summarized = []
-        for action, observation in steps:
-            summarized.append(
-                {
-                    "tool": getattr(action, "tool", None),
-                    "tool_input": getattr(action, "tool_input", None),
-                    "observation_preview": str(observation)[:300],
-                }
-            )
-        tool_summary = summarized
-
-    return AgentResponse(output=output, tool_summary=tool_summary)
+    응답은 Server-Sent Events로 스트리밍한다.
+    - event: token  -> {"content": "..."} (생성되는 답변 토큰)
+    - event: final  -> AgentResponse (최종 답변 + debug 시 tool_summary)
+    - event: error  -> {"message": "..."}
+    """
+    return StreamingResponse(_agent_events(req), media_type="text/event-stream")
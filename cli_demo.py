@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -19,11 +20,16 @@ def main():
     session_id = "local-demo"
 
     print("AI Code Rule Checker Agent Demo. 종료: /q")
+    # 히스토리 엔진(aiosqlite)의 연결이 이벤트 루프에 묶이므로, 턴마다 asyncio.run을 하지 않고 하나의 루프에서 대화를 진행한다
+    asyncio.run(chat_loop(agent, session_id))
+
+
+async def chat_loop(agent, session_id: str):
     while True:
-        user = input("You> ")
+        user = await asyncio.to_thread(input, "You> ")
         if user.strip() in {"/q", "/quit", "quit", "exit"}:
             break
-        out = agent.invoke(
+        out = await agent.ainvoke(
             {"input": user},
             config={"configurable": {"session_id": session_id}},
         )
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+from langchain_core.agents import AgentAction
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import SystemMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+from langchain_core.tools import BaseTool
+
+
+class PlanStep(BaseModel):
+    id: int = Field(..., description="단계 번호(1부터 시작)")
+    tool: str = Field(..., description="호출할 도구 이름")
+    args: Dict[str, Any] = Field(default_factory=dict, description="도구 입력(JSON)")
+    deps: List[int] = Field(default_factory=list, description="먼저 끝나야 하는 단계 번호 목록")
+
+
+class Plan(BaseModel):
+    """도구 호출 DAG. 서로 의존하지 않는 단계는 동시에 실행된다."""
+    steps: List[PlanStep] = Field(default_factory=list, description="도구 호출 단계 목록(도구가 필요 없으면 빈 목록)")
+
+
+# planner LLM 호출에 붙이는 tag(스트리밍 시 계획 토큰을 사용자 응답에서 제외하는 데 사용)
+PLANNER_TAG = "planner"
+
+PLANNER_SYSTEM_MSG = (
+    "당신은 AI Code Rule Checker 에이전트의 실행 계획을 세우는 planner이다.\n"
+    "사용자 요청을 처리하는 데 필요한 도구 호출만 골라 DAG 형태의 계획으로 만든다.\n"
+    "계획 원칙:\n"
+    "1) 서로의 결과가 필요 없는 단계는 deps를 비워 동시에 실행되도록 한다.\n"
+    "2) 앞 단계가 끝난 뒤에만 의미가 있는 단계(예: add_rule 이후 rebuild_rules_index)만 deps에 앞 단계 id를 적는다.\n"
+    "3) 코드 검사 시 사용자가 준 코드를 그대로 args에 넣는다.\n"
+    "4) 도구가 필요 없는 요청이면 steps를 빈 목록으로 둔다.\n"
+    "사용 가능한 도구:\n{tools}"
+)
+
+
+def _render_tools(tools: Sequence[BaseTool]) -> str:
+    return "\n".join(
+        f"- {t.name}: {t.description} args={json.dumps(t.args, ensure_ascii=False)}" for t in tools
+    )
+
+
+def _waves(steps: List[PlanStep]) -> List[List[PlanStep]]:
+    """
+    deps 기준으로 단계를 위상 정렬하여, 동시에 실행 가능한 묶음(wave) 목록을 만든다.
+    알 수 없는 단계를 참조하거나 순환이 있으면 ValueError를 던진다.
+    """
+    by_id = {s.id: s for s in steps}
+    for s in steps:
+        for d in s.deps:
+            if d not in by_id:
+                raise ValueError(f"Unknown dependency: step {s.id} -> {d}")
+
+    done: set = set()
+    pending = list(steps)
+    waves: List[List[PlanStep]] = []
+    while pending:
+        ready = [s for s in pending if all(d in done for d in s.deps)]
+        if not ready:
+            raise ValueError("Cyclic dependencies in plan")
+        waves.append(ready)
+        done.update(s.id for s in ready)
+        pending = [s for s in pending if s.id not in done]
+    return waves
+
+
+def build_parallel_agent(
+    llm: BaseChatModel,
+    tools: Sequence[BaseTool],
+    system_message: SystemMessage,
+    fallback: Runnable,
+    max_execution_time: Optional[float] = None,
+) -> Runnable:
+    """
+    LLMCompiler 스타일 에이전트를 구성한다.
+    - planner: LLM 1회 호출로 도구 호출 DAG(Plan)를 만든다.
+    - scheduler: 의존성이 없는 단계들을 asyncio.gather로 동시에 실행한다.
+    - joiner: 도구 결과를 근거로 최종 답변을 작성한다.
+    계획 수립/실행에 실패하면 fallback(기존 AgentExecutor)으로 처리한다.
+    반환 형식은 AgentExecutor와 동일하게 {"output": ..., "intermediate_steps": [...]}이다.
+    ainvoke/astream_events로만 실행한다(동기 invoke는 지원하지 않는다).
+    """
+    tools_by_name = {t.name: t for t in tools}
+
+    # 도구 목록은 빌드 시점에 고정되므로 planner system 메시지도 여기서 1번만 만든다
+    planner_prompt = ChatPromptTemplate.from_messages([
+        SystemMessage(content=PLANNER_SYSTEM_MSG.format(tools=_render_tools(tools))),
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+    ])
+    planner = (planner_prompt | llm.with_structured_output(Plan, method="function_calling")).with_config(
+        tags=[PLANNER_TAG]
+    )
+
+    joiner_prompt = ChatPromptTemplate.from_messages([
+        system_message,
+        MessagesPlaceholder(variable_name="chat_history"),
+        ("human", "{input}"),
+        ("system", "도구 실행 결과:\n{observations}"),
+    ])
+    joiner = joiner_prompt | llm
+
+    async def _run_step(step: PlanStep, config: RunnableConfig) -> Tuple[AgentAction, str]:
+        action = AgentAction(tool=step.tool, tool_input=step.args, log="")
+        t = tools_by_name.get(step.tool)
+        if t is None:
+            return (action, f"알 수 없는 도구: {step.tool}")
+        try:
+            observation = await t.ainvoke(step.args, config=config)
+        except Exception as e:
+            observation = f"도구 실행 실패: {e}"
+        return (action, str(observation))
+
+    async def _execute(waves: List[List[PlanStep]], config: RunnableConfig) -> List[Tuple[AgentAction, str]]:
+        steps: List[Tuple[AgentAction, str]] = []
+        for wave in waves:
+            steps.extend(await asyncio.gather(*(_run_step(s, config) for s in wave)))
+        return steps
+
+    async def _ainvoke(inputs: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        try:
+            plan: Plan = await planner.ainvoke(inputs, config=config)
+            waves = _waves(plan.steps)
+        except Exception:
+            # 계획을 만들지 못하면 기존 ReAct 방식으로 처리한다
+            return await fallback.ainvoke(inputs, config=config)
+
+        try:
+            steps = await asyncio.wait_for(_execute(waves, config), timeout=max_execution_time)
+        except asyncio.TimeoutError:
+            return {"output": "도구 실행 시간이 초과되어 작업을 중단했다.", "intermediate_steps": []}
+
+        observations = "\n".join(
+            f"[{i}] {action.tool}({json.dumps(action.tool_input, ensure_ascii=False)}) -> {obs}"
+            for i, (action, obs) in enumerate(steps, start=1)
+        ) or "(도구를 호출하지 않았다)"
+        answer = await joiner.ainvoke({**inputs, "observations": observations}, config=config)
+        return {"output": answer.content, "intermediate_steps": steps}
+
+    # async 전용: 동기 invoke를 호출하면 RunnableLambda가 TypeError를 던진다
+    return RunnableLambda(_ainvoke, name="ParallelToolAgent")
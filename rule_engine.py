@@ -1,8 +1,24 @@
 from __future__ import annotations
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Iterator, List, Optional, Tuple
+import difflib
 import re
+import threading
+
+# str.splitlines()가 "\n" 외에 줄바꿈으로 취급하는 문자들
+_LINE_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+# str.splitlines(keepends=True)의 한 라인(내용 + 줄바꿈 1개)
+_LINE_RE = re.compile(r"[^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*(?:\r\n|[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029])?")
+
+# from X import * (모듈 경로는 공백 없는 토큰이므로 \S+로 백트래킹을 줄인다)
+_WILDCARD_RE = re.compile(r"^\s*from\s+\S+\s+import\s+\*\s*$")
+
+# 줄바꿈이 "\n"뿐인 버퍼를 한 번에 스캔하는 패턴(MULTILINE: ^/$가 각 라인의 시작/끝)
+# - _WILDCARD_RE와 같지만 \s 대신 "\n을 제외한 공백"을 사용하여 라인을 넘어가지 않는다
+_WILDCARD_ML_RE = re.compile(r"^[^\S\n]*from[^\S\n]+\S+[^\S\n]+import[^\S\n]+\*[^\S\n]*$", re.MULTILINE)
 
 
 @dataclass(frozen=True)
@@ -13,6 +29,7 @@ class SimpleViolation:
     start_line: Optional[int] = None
     end_line: Optional[int] = None
     suggestion: Optional[str] = None
+    severity: str = "warning"
 
 
 def _is_import_line(line: str) -> bool:
@@ -55,6 +72,29 @@ def _collect_top_import_block(lines: List[str]) -> Tuple[int, int]:
     return (start, end)
 
 
+def _iter_lines(code: str) -> Iterator[str]:
+    """code.splitlines(keepends=True)와 같은 라인을, 필요한 만큼만 앞에서부터 만든다."""
+    for m in _LINE_RE.finditer(code):
+        if m.start() == m.end():
+            return
+        yield m.group()
+
+
+def _top_import_lines(code: str) -> List[str]:
+    """
+    _collect_top_import_block과 같은 기준으로 상단 import 블록의 import/from 라인만 모은다.
+    - 블록이 끝나면 바로 멈추므로, 파일 나머지는 라인으로 나누지 않는다.
+    """
+    out: List[str] = []
+    for ln in _iter_lines(code):
+        if ln.strip() == "" or ln.lstrip().startswith("#"):
+            continue
+        if not _is_import_line(ln):
+            break
+        out.append(ln)
+    return out
+
+
 def _import_sort_key(line: str) -> str:
     s = line.strip()
     if s.startswith("from "):
@@ -66,11 +106,23 @@ def _import_sort_key(line: str) -> str:
     return s
 
 
-def check_import_alphabetical(code: str) -> Tuple[List[SimpleViolation], Optional[str]]:
+def _import_alphabetical(
+    code: str,
+) -> Tuple[List[SimpleViolation], Optional[List[str]], Optional[List[str]]]:
+    """
+    반환: (vios, lines, fixed_lines)
+    - lines: code.splitlines(keepends=True) (fast path로 끝나면 None)
+    - fixed_lines: 정렬된 결과 라인 리스트(위반이 없으면 None)
+    """
+    # fast path: 상단 import 라인만 보고 이미 정렬되어 있으면 파일 전체를 복사하지 않고 끝낸다
+    keys = [_import_sort_key(ln) for ln in _top_import_lines(code)]
+    if all(a <= b for a, b in zip(keys, keys[1:])):
+        return ([], None, None)
+
     lines = code.splitlines(keepends=True)
     start, end = _collect_top_import_block(lines)
     if start == end:
-        return ([], None)
+        return ([], lines, None)
 
     block = lines[start:end]
     import_lines_with_idx = [(idx, ln) for idx, ln in enumerate(block) if _is_import_line(ln)]
@@ -78,7 +130,7 @@ def check_import_alphabetical(code: str) -> Tuple[List[SimpleViolation], Optiona
     sorted_lines = sorted(import_lines, key=_import_sort_key)
 
     if import_lines == sorted_lines:
-        return ([], None)
+        return ([], lines, None)
 
     vio = SimpleViolation(
         rule_id="PY-IMPORT-ALPHA",
@@ -95,71 +147,275 @@ def check_import_alphabetical(code: str) -> Tuple[List[SimpleViolation], Optiona
         fixed_block[rel_idx] = next(it)
 
     fixed_lines = lines[:start] + fixed_block + lines[end:]
-    fixed_code = "".join(fixed_lines)
-    return ([vio], fixed_code)
+    return ([vio], lines, fixed_lines)
 
 
-def check_no_wildcard_import(code: str) -> List[SimpleViolation]:
-    vios: List[SimpleViolation] = []
-    for i, line in enumerate(code.splitlines(), start=1):
-        if re.match(r"^\s*from\s+.+\s+import\s+\*\s*$", line):
-            vios.append(
-                SimpleViolation(
-                    rule_id="PY-NO-WILDCARD-IMPORT",
-                    title="from X import * 를 금지한다",
-                    message="wildcard import(`from ... import *`)가 발견되었다.",
-                    start_line=i,
-                    end_line=i,
-                    suggestion="명시적으로 필요한 심볼만 import한다.",
-                )
-            )
-    return vios
+def check_import_alphabetical(code: str) -> Tuple[List[SimpleViolation], Optional[str]]:
+    vios, _, fixed_lines = _import_alphabetical(code)
+    return (vios, "".join(fixed_lines) if fixed_lines is not None else None)
 
 
-def fix_trailing_whitespace(code: str) -> Tuple[List[SimpleViolation], Optional[str]]:
-    lines = code.splitlines(keepends=True)
-    vios: List[SimpleViolation] = []
-    fixed_any = False
+def _wildcard_violation(lineno: int) -> SimpleViolation:
+    return SimpleViolation(
+        rule_id="PY-NO-WILDCARD-IMPORT",
+        title="from X import * 를 금지한다",
+        message="wildcard import(`from ... import *`)가 발견되었다.",
+        start_line=lineno,
+        end_line=lineno,
+        suggestion="명시적으로 필요한 심볼만 import한다.",
+        severity="error",
+    )
+
+
+def _trailing_ws_violation(lineno: int) -> SimpleViolation:
+    return SimpleViolation(
+        rule_id="PY-NO-TRAILING-WS",
+        title="라인 끝 공백을 금지한다",
+        message="라인 끝 공백이 발견되었다.",
+        start_line=lineno,
+        end_line=lineno,
+        suggestion="라인 끝 공백을 제거한다.",
+    )
+
+
+def _line_length_violation(lineno: int, length: int, limit: int) -> SimpleViolation:
+    return SimpleViolation(
+        rule_id="PY-LINE-LENGTH-88",
+        title="라인 길이는 88자를 넘기지 않는다",
+        message=f"라인 길이 {length}자가 {limit}자를 초과한다.",
+        start_line=lineno,
+        end_line=lineno,
+        suggestion="라인을 분리하거나 문자열/표현식을 정리한다.",
+        severity="info",
+    )
+
+
+def _has_trailing_ws(code: str) -> bool:
+    # 라인 끝 공백은 "\n" 직전 또는 파일 끝에만 있을 수 있으므로, 부분 문자열 검색(C 레벨)으로 판별한다
+    return " \n" in code or "\t\n" in code or code.endswith((" ", "\t"))
+
+
+def _iter_match_lines(pattern: "re.Pattern[str]", code: str) -> Iterator[Tuple[int, "re.Match[str]"]]:
+    # 매치마다 직전 매치 이후의 "\n" 개수만 세어 라인 번호를 누적한다
+    lineno = 1
+    pos = 0
+    for m in pattern.finditer(code):
+        lineno += code.count("\n", pos, m.start())
+        pos = m.start()
+        yield lineno, m
+
+
+def _line_rules_lf(
+    code: str,
+    limit: int,
+) -> Tuple[List[SimpleViolation], List[SimpleViolation]]:
+    """
+    라인 끝 공백이 없고 "*"가 있으며 줄바꿈이 "\n"뿐인 버퍼는 라인 순회 없이 검사만 한다.
+    - 라인 끝 공백이 없으므로 auto_fix 여부와 관계없이 검사 대상 라인이 같다.
+    - wildcard import는 컴파일된 패턴으로 버퍼 전체를 한 번 스캔하여(SRE, C 레벨) 위반 위치만 찾는다.
+    반환: (wildcard_vios, line_length_vios)
+    """
+    wc_vios = [_wildcard_violation(i) for i, _ in _iter_match_lines(_WILDCARD_ML_RE, code)]
+
+    # 라인 길이는 정규식 스캔보다 splitlines() + map(len)이 빠르다(라인 수만큼 매치 시도가 필요하다)
+    len_vios = check_line_length(code, limit)
+    return (wc_vios, len_vios)
+
+
+def _line_rules(
+    code: str,
+    limit: int,
+    auto_fix: bool,
+    lines: Optional[List[str]] = None,
+) -> Tuple[List[SimpleViolation], Optional[List[str]], List[SimpleViolation], List[SimpleViolation]]:
+    """
+    라인 단위 규칙(trailing whitespace / wildcard import / line length)을 한 번의 순회로 검사한다.
+    - auto_fix=True이면 wildcard/line length는 라인 끝 공백을 제거한 라인 기준으로 검사한다.
+    - 버퍼 전체에 대한 부분 문자열 검색으로 해당 규칙이 위반될 수 없으면 그 규칙은 라인마다 검사하지 않는다.
+    - 라인 끝 공백이 없고 줄바꿈이 "\n"뿐이면 라인 순회 대신 _line_rules_lf로 버퍼 전체를 스캔한다.
+    - lines: 이미 나눈 code.splitlines(keepends=True)가 있으면 넘겨서 다시 나누지 않는다.
+    반환: (trailing_ws_vios, fixed_lines, wildcard_vios, line_length_vios)
+    """
+    need_ws = _has_trailing_ws(code)
+    need_wc = "*" in code
+    if not need_ws:
+        # 라인 끝 공백이 없으면 수정할 것이 없으므로 라인 순회 없이 검사만 한다
+        if not need_wc:
+            return ([], None, [], check_line_length(code, limit))
+        if not any(ch in code for ch in _LINE_BREAKS):
+            wc_vios, len_vios = _line_rules_lf(code, limit)
+            return ([], None, wc_vios, len_vios)
+
+    ws_vios: List[SimpleViolation] = []
+    wc_vios: List[SimpleViolation] = []
+    len_vios: List[SimpleViolation] = []
     fixed_lines: List[str] = []
-    for idx, ln in enumerate(lines, start=1):
+
+    if lines is None:
+        lines = code.splitlines(keepends=True)
+
+    for i, ln in enumerate(lines, start=1):
         if ln.endswith("\n"):
             body = ln[:-1]
             nl = "\n"
         else:
             body = ln
             nl = ""
-        if body.rstrip(" \t") != body:
-            fixed_any = True
-            vios.append(
-                SimpleViolation(
-                    rule_id="PY-NO-TRAILING-WS",
-                    title="라인 끝 공백을 금지한다",
-                    message="라인 끝 공백이 발견되었다.",
-                    start_line=idx,
-                    end_line=idx,
-                    suggestion="라인 끝 공백을 제거한다.",
-                )
-            )
-            body = body.rstrip(" \t")
-        fixed_lines.append(body + nl)
-
-    if not fixed_any:
+
+        stripped = body
+        if need_ws:
+            stripped = body.rstrip(" \t")
+            if stripped != body:
+                ws_vios.append(_trailing_ws_violation(i))
+            if stripped or nl:
+                # 공백만 있던 마지막 라인은 빈 문자열이 되므로 넣지 않는다(fixed_code.splitlines(True)와 동일하게 유지)
+                fixed_lines.append(stripped + nl)
+
+        line = (stripped if auto_fix else body).rstrip(_LINE_BREAKS)
+
+        if need_wc and "*" in line and _WILDCARD_RE.match(line):
+            wc_vios.append(_wildcard_violation(i))
+        if len(line) > limit:
+            len_vios.append(_line_length_violation(i, len(line), limit))
+
+    return (ws_vios, fixed_lines if ws_vios else None, wc_vios, len_vios)
+
+
+def run_line_rules(
+    code: str,
+    limit: int = 88,
+    auto_fix: bool = True,
+) -> Tuple[List[SimpleViolation], Optional[str], List[SimpleViolation], List[SimpleViolation]]:
+    """
+    라인 단위 규칙을 한 번의 순회로 검사한다.
+    반환: (trailing_ws_vios, fixed_code, wildcard_vios, line_length_vios)
+    """
+    ws_vios, fixed_lines, wc_vios, len_vios = _line_rules(code, limit, auto_fix)
+    fixed_code = "".join(fixed_lines) if fixed_lines is not None else None
+    return (ws_vios, fixed_code, wc_vios, len_vios)
+
+
+def check_no_wildcard_import(code: str) -> List[SimpleViolation]:
+    if "*" not in code:
+        return []
+    return [
+        _wildcard_violation(i)
+        for i, line in enumerate(code.splitlines(), start=1)
+        if "*" in line and _WILDCARD_RE.match(line)
+    ]
+
+
+def fix_trailing_whitespace(code: str) -> Tuple[List[SimpleViolation], Optional[str]]:
+    if not _has_trailing_ws(code):
         return ([], None)
-    return (vios, "".join(fixed_lines))
+    vios, fixed_code, _, _ = run_line_rules(code)
+    return (vios, fixed_code)
 
 
 def check_line_length(code: str, limit: int = 88) -> List[SimpleViolation]:
-    vios: List[SimpleViolation] = []
-    for i, line in enumerate(code.splitlines(), start=1):
-        if len(line) > limit:
-            vios.append(
-                SimpleViolation(
-                    rule_id="PY-LINE-LENGTH-88",
-                    title="라인 길이는 88자를 넘기지 않는다",
-                    message=f"라인 길이 {len(line)}자가 {limit}자를 초과한다.",
-                    start_line=i,
-                    end_line=i,
-                    suggestion="라인을 분리하거나 문자열/표현식을 정리한다.",
-                )
-            )
-    return vios
+    """
+    라인 길이만 검사한다(run_line_rules의 다른 규칙/수정 버퍼를 거치지 않는다).
+    - 전체 길이가 limit 이하이면 라인을 나누지 않고 바로 반환한다.
+    - 라인 길이는 map(len, ...)으로 계산하고, limit을 넘는 라인만 위반 객체로 만든다.
+    """
+    if len(code) <= limit:
+        return []
+    return [
+        _line_length_violation(i, n, limit)
+        for i, n in enumerate(map(len, code.splitlines()), start=1)
+        if n > limit
+    ]
+
+
+# (original, fixed_code) -> unified diff. 에이전트 재시도 등으로 같은 코드를 다시 검사할 때 diff를 재계산하지 않는다
+_DIFF_CACHE: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_DIFF_CACHE_SIZE = 16
+_DIFF_CACHE_LOCK = threading.Lock()
+
+
+def make_unified_diff(
+    original: str,
+    fixed_code: str,
+    original_lines: Optional[List[str]] = None,
+    fixed_lines: Optional[List[str]] = None,
+) -> Optional[str]:
+    """
+    원본과 수정본의 unified diff를 만든다(같으면 None).
+    - 호출자가 이미 나눈 라인 리스트(keepends)를 넘기면 다시 splitlines 하지 않는다.
+    """
+    if fixed_code == original:
+        return None
+
+    key = (original, fixed_code)
+    with _DIFF_CACHE_LOCK:
+        cached = _DIFF_CACHE.get(key)
+        if cached is not None:
+            _DIFF_CACHE.move_to_end(key)
+            return cached
+
+    diff = "".join(
+        difflib.unified_diff(
+            original_lines if original_lines is not None else original.splitlines(True),
+            fixed_lines if fixed_lines is not None else fixed_code.splitlines(True),
+            fromfile="before.py",
+            tofile="after.py",
+        )
+    )
+    with _DIFF_CACHE_LOCK:
+        _DIFF_CACHE[key] = diff
+        if len(_DIFF_CACHE) > _DIFF_CACHE_SIZE:
+            _DIFF_CACHE.popitem(last=False)
+    return diff
+
+
+@dataclass(frozen=True)
+class RuleCheckOutcome:
+    violations: List[SimpleViolation]
+    fixed_code: Optional[str] = None
+    unified_diff: Optional[str] = None
+
+
+def run_all_rules(
+    code: str,
+    auto_fix: bool = True,
+    include_diff: bool = True,
+    limit: int = 88,
+) -> RuleCheckOutcome:
+    """
+    deterministic 규칙 전체를 순서대로 실행한다: import 정렬 → trailing whitespace / wildcard / line length.
+    - 각 단계가 만든 라인 리스트를 그대로 넘겨, diff를 만들 때 원본/수정본을 다시 나누지 않는다.
+    - auto_fix=True이면 앞 단계의 수정 결과를 다음 단계의 입력으로 사용한다.
+    """
+    original = code
+    violations: List[SimpleViolation] = []
+    fixed_code: Optional[str] = None
+    fixed_lines: Optional[List[str]] = None
+
+    # 1) import 알파벳 정렬(수정 가능)
+    imp_vios, original_lines, imp_fixed = _import_alphabetical(code)
+    violations.extend(imp_vios)
+    if auto_fix and imp_fixed:
+        code = fixed_code = "".join(imp_fixed)
+        # 줄바꿈 없는 마지막 라인이 정렬로 앞으로 옮겨지면 라인 경계가 달라지므로 그때는 diff에서 다시 나눈다
+        if "\r" not in code and imp_fixed[-1] == original_lines[-1]:
+            fixed_lines = imp_fixed
+
+    # 2) trailing whitespace (수정 가능) + 3) wildcard import / 4) line length (검사만)
+    #    import 단계가 나눈 라인 리스트를 그대로 넘겨, 파일 전체를 한 번만 나누고 한 번만 순회한다
+    line_input = fixed_lines if fixed_code is not None else original_lines
+    ws_vios, ws_fixed, wc_vios, len_vios = _line_rules(code, limit, auto_fix, line_input)
+    violations.extend(ws_vios)
+    violations.extend(wc_vios)
+    violations.extend(len_vios)
+    if auto_fix and ws_fixed is not None:
+        ws_code = "".join(ws_fixed)
+        if ws_code:
+            # "\r" 뒤 공백 라인이 지워지면 "\r\n"으로 합쳐져 라인 경계가 달라지므로 그때는 diff에서 다시 나눈다
+            fixed_lines = ws_fixed if "\r" not in ws_code else None
+            fixed_code = ws_code
+
+    unified_diff = None
+    if include_diff and fixed_code and fixed_code != original:
+        unified_diff = make_unified_diff(original, fixed_code, original_lines, fixed_lines)
+
+    return RuleCheckOutcome(violations=violations, fixed_code=fixed_code, unified_diff=unified_diff)
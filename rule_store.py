@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+
+
+def stable_short_hash(text: str) -> str:
+    # 내장 hash()는 프로세스마다 값이 바뀌므로(PYTHONHASHSEED) blake2b로 재시작 후에도 같은 id를 만든다
+    return f"{int(hashlib.blake2b(text.encode('utf-8'), digest_size=3).hexdigest(), 16) % 10000:04d}"
 
 
 class RuleStore:
@@ -14,14 +22,41 @@ class RuleStore:
     def __init__(self, path: Path):
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        # (st_mtime_ns, parsed data): 파일이 바뀌지 않았으면 다시 읽지 않는다
+        self._cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        # rule_id -> rules 리스트 index (캐시와 함께 갱신한다)
+        self._id_index: Dict[str, int] = {}
+        # 병렬 도구 실행(planner wave)에서 add_rule 등이 스레드에서 동시에 호출되므로
+        # load → 수정 → 쓰기와 캐시/index 갱신을 하나의 lock으로 묶는다(load를 안에서 다시 부르므로 RLock)
+        self._lock = threading.RLock()
+
+    def _set_cache(self, mtime_ns: int, data: Dict[str, Any]) -> None:
+        self._cache = (mtime_ns, data)
+        self._id_index = {r.get("id"): i for i, r in enumerate(data.get("rules", []))}
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        # orjson은 항상 UTF-8(non-ASCII 그대로)로 직렬화하므로 기존 ensure_ascii=False 출력과 같다
+        self.path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+        self._cache = (self.path.stat().st_mtime_ns, data)
 
     def load(self) -> Dict[str, Any]:
-        if not self.path.exists():
-            return {"team_name": "unknown", "members": [], "rules": []}
-        return json.loads(self.path.read_text(encoding="utf-8"))
+        with self._lock:
+            try:
+                st = self.path.stat()
+            except FileNotFoundError:
+                self._cache = None
+                self._id_index = {}
+                return {"team_name": "unknown", "members": [], "rules": []}
+            if self._cache and self._cache[0] == st.st_mtime_ns:
+                return self._cache[1]
+            data = orjson.loads(self.path.read_bytes())
+            self._set_cache(st.st_mtime_ns, data)
+            return data
 
     def save(self, data: Dict[str, Any]) -> None:
-        self.path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        with self._lock:
+            self._write(data)
+            self._set_cache(self._cache[0], data)
 
     def team_name(self) -> str:
         return str(self.load().get("team_name", "unknown"))
@@ -33,30 +68,36 @@ class RuleStore:
         return list(self.load().get("rules", []))
 
     def get_rule(self, rule_id: str) -> Optional[Dict[str, Any]]:
-        for r in self.list_rules():
-            if r.get("id") == rule_id:
-                return r
-        return None
+        with self._lock:
+            data = self.load()
+            i = self._id_index.get(rule_id)
+            return data["rules"][i] if i is not None else None
 
     def add_rule(self, rule: Dict[str, Any]) -> None:
-        data = self.load()
-        rules = data.get("rules", [])
-        rule_ids = {r.get("id") for r in rules}
-        if rule.get("id") in rule_ids:
-            raise ValueError(f"Rule id already exists: {rule.get('id')}")
-        rules.append(rule)
-        data["rules"] = rules
-        self.save(data)
+        with self._lock:
+            # 캐시된 dict를 직접 변경하지 않도록 얕은 복사 후 저장한다
+            data = dict(self.load())
+            if rule.get("id") in self._id_index:
+                raise ValueError(f"Rule id already exists: {rule.get('id')}")
+            rules = list(data.get("rules", []))
+            rules.append(rule)
+            data["rules"] = rules
+            self._write(data)
+            self._id_index[rule.get("id")] = len(rules) - 1
 
     def update_rule(self, rule_id: str, patch: Dict[str, Any]) -> None:
-        data = self.load()
-        rules = data.get("rules", [])
-        for i, r in enumerate(rules):
-            if r.get("id") == rule_id:
-                merged = dict(r)
-                merged.update(patch)
-                rules[i] = merged
-                data["rules"] = rules
-                self.save(data)
-                return
-        raise ValueError(f"Rule not found: {rule_id}")
+        with self._lock:
+            data = dict(self.load())
+            i = self._id_index.get(rule_id)
+            if i is None:
+                raise ValueError(f"Rule not found: {rule_id}")
+            rules = list(data["rules"])
+            merged = dict(rules[i])
+            merged.update(patch)
+            rules[i] = merged
+            data["rules"] = rules
+            self._write(data)
+            # patch로 id가 바뀌는 경우까지 반영한다
+            if merged.get("id") != rule_id:
+                del self._id_index[rule_id]
+                self._id_index[merged.get("id")] = i
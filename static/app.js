@@ -82,6 +82,23 @@
     metaDiv.innerHTML = `<span>${role === "user" ? "You" : "AI"}</span><span class="pill">${escapeHtml(meta || now())}</span>`;
     wrap.appendChild(metaDiv);
 
+    renderBubbleBody(wrap, text);
+
+    chatLog.appendChild(wrap);
+    chatLog.scrollTop = chatLog.scrollHeight;
+    return wrap;
+  }
+
+  // streaming: replace bubble body (keeps the meta line)
+  function setBubbleText(wrap, text){
+    while(wrap.children.length > 1){
+      wrap.removeChild(wrap.lastChild);
+    }
+    renderBubbleBody(wrap, text);
+    chatLog.scrollTop = chatLog.scrollHeight;
+  }
+
+  function renderBubbleBody(wrap, text){
     // basic formatting: if contains triple backticks, render code blocks
     const parts = text.split("```");
     if(parts.length === 1){
@@ -111,9 +128,6 @@
         }
       });
     }
-
-    chatLog.appendChild(wrap);
-    chatLog.scrollTop = chatLog.scrollHeight;
   }
 
   async function postJson(url, data){
@@ -133,6 +147,47 @@
     }
   }
 
+  // POST + Server-Sent Events: calls onEvent(event, data) for each event
+  async function postSse(url, data, onEvent){
+    const res = await fetch(url, {
+      method: "POST",
+      headers: {"Content-Type":"application/json"},
+      body: JSON.stringify(data),
+    });
+    if(!res.ok){
+      const text = await res.text();
+      throw new Error(text || ("HTTP " + res.status));
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    while(true){
+      const {value, done} = await reader.read();
+      if(done) break;
+      buf += decoder.decode(value, {stream: true});
+
+      let sep;
+      while((sep = buf.indexOf("\n\n")) >= 0){
+        const raw = buf.slice(0, sep);
+        buf = buf.slice(sep + 2);
+        let event = "message";
+        let payload = "";
+        raw.split("\n").forEach((line) => {
+          if(line.startsWith("event:")) event = line.slice(6).trim();
+          else if(line.startsWith("data:")) payload += line.slice(5).trim();
+        });
+        let parsed;
+        try{
+          parsed = JSON.parse(payload);
+        }catch(e){
+          parsed = {raw: payload};
+        }
+        onEvent(event, parsed);
+      }
+    }
+  }
+
   async function sendChat(){
     const msg = chatInput.value;
     if(!msg.trim()) return;
@@ -142,16 +197,23 @@
     chatInput.value = "";
     chatInput.focus();
 
-    // loading bubble
-    const loadingId = "loading-" + Date.now();
-    appendBubble("assistant", "생각 중…", loadingId);
+    // loading bubble: replaced in place as tokens stream in
+    const bubble = appendBubble("assistant", "생각 중…");
+    let answer = "";
 
     try{
-      const out = await postJson("/agent", {session_id: sid, input: msg, debug: false});
-      // remove loading bubble: simplest is to append actual answer and keep loading; replace would be more complex
-      appendBubble("assistant", out.output || JSON.stringify(out, null, 2));
+      await postSse("/agent", {session_id: sid, input: msg, debug: false}, (event, data) => {
+        if(event === "token"){
+          answer += data.content || "";
+          setBubbleText(bubble, answer);
+        }else if(event === "final"){
+          setBubbleText(bubble, data.output || answer || JSON.stringify(data, null, 2));
+        }else if(event === "error"){
+          setBubbleText(bubble, "에러: " + String(data.message || data.raw || "unknown"));
+        }
+      });
     }catch(err){
-      appendBubble("assistant", "에러: " + String(err.message || err));
+      setBubbleText(bubble, "에러: " + String(err.message || err));
     }
   }
 
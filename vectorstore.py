@@ -1,20 +1,40 @@
 from __future__ import annotations
 
+import functools
+import hashlib
 import os
-from typing import List, Dict, Any
+import pickle
+import re
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 
+from rank_bm25 import BM25Okapi
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 
 
+@functools.lru_cache(maxsize=1)
+def get_embeddings() -> OpenAIEmbeddings:
+    # HTTP 클라이언트를 재사용하도록 프로세스당 1개만 만든다
+    return OpenAIEmbeddings()
+
+
+def _persist_dir() -> str:
+    return os.getenv("RULES_CHROMA_DIR", "chroma_rules")
+
+
+@functools.lru_cache(maxsize=1)
 def get_rules_vectorstore() -> Chroma:
-    persist_dir = os.getenv("RULES_CHROMA_DIR", "chroma_rules")
+    """
+    Chroma 컬렉션 핸들을 프로세스당 1개만 만든다(sqlite/HNSW 인덱스 로딩 비용 제거).
+    - 컬렉션을 삭제(delete_collection)한 경우에는 get_rules_vectorstore.cache_clear()로 다시 만들어야 한다.
+    """
+    persist_dir = _persist_dir()
     collection = os.getenv("RULES_COLLECTION", "team_rules")
-    embeddings = OpenAIEmbeddings()
     return Chroma(
         collection_name=collection,
-        embedding_function=embeddings,
+        embedding_function=get_embeddings(),
         persist_directory=persist_dir,
     )
 
@@ -27,25 +47,127 @@ def rules_to_documents(rules: List[Dict[str, Any]]) -> List[Document]:
         desc = r.get("description", "")
         lang = r.get("language", "any")
         content = f"[{rid}] ({lang}) {title}\n{desc}".strip()
-        docs.append(Document(page_content=content, metadata={"rule_id": rid, "language": lang}))
+        content_hash = hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+        docs.append(
+            Document(
+                page_content=content,
+                metadata={"rule_id": rid, "language": lang, "content_hash": content_hash},
+            )
+        )
     return docs
 
 
+# 키워드 검색 결과를 그대로 쓰기 위한 BM25 최소 점수(이보다 낮은 규칙만 맞으면 임베딩 검색으로 넘긴다)
+KEYWORD_MIN_SCORE = float(os.getenv("RULES_KEYWORD_MIN_SCORE", "0.5"))
+
+
+def _tokenize(text: str) -> List[str]:
+    # 구두점은 버리고 단어(\w+)만 남긴다("functions?" -> "functions", "않는다." -> "않는다")
+    return re.findall(r"\w+", text.lower())
+
+
+def _keyword_index_path() -> Path:
+    # Chroma persist 디렉토리 안에 함께 저장한다
+    return Path(_persist_dir()) / "keyword_index.pkl"
+
+
+# (st_mtime_ns, index, bm25): 파일이 바뀌지 않았으면 다시 unpickle/BM25 구성을 하지 않는다
+_keyword_cache: Optional[Tuple[int, Dict[str, Any], BM25Okapi]] = None
+
+
+def _save_keyword_index(rules: List[Dict[str, Any]], docs: List[Document]) -> None:
+    """
+    BM25용 title+description 토큰 목록과, 검색 결과로 그대로 돌려줄 문서(content/metadata)를 저장한다.
+    """
+    index = {
+        "corpus": [_tokenize(f"{r.get('title', '')} {r.get('description', '')}") for r in rules],
+        "docs": [{"content": d.page_content, "metadata": d.metadata} for d in docs],
+    }
+
+    path = _keyword_index_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_bytes(pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL))
+    os.replace(tmp, path)
+
+
+def _load_keyword_index() -> Optional[Tuple[Dict[str, Any], BM25Okapi]]:
+    global _keyword_cache
+    path = _keyword_index_path()
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _keyword_cache is None or _keyword_cache[0] != mtime_ns:
+        index = pickle.loads(path.read_bytes())
+        if not index.get("docs"):
+            return None
+        _keyword_cache = (mtime_ns, index, BM25Okapi(index["corpus"]))
+    return _keyword_cache[1], _keyword_cache[2]
+
+
+def _keyword_search(query: str, k: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    질의를 BM25로 채점하여 KEYWORD_MIN_SCORE 이상인 규칙을 점수 순으로 찾는다.
+    - 여러 규칙에 흔히 등장하는 단어(예: "the", "import")는 IDF가 0 이하라 점수에 거의 기여하지 않는다.
+    - 기준을 넘는 규칙이 min(k, 전체 규칙 수)개보다 적으면 None을 반환한다(임베딩 검색으로 넘긴다).
+    """
+    loaded = _load_keyword_index()
+    q = _tokenize(query)
+    if loaded is None or not q:
+        return None
+
+    index, bm25 = loaded
+    docs = index["docs"]
+    scores = bm25.get_scores(q)
+    hits = [i for i in range(len(docs)) if scores[i] >= KEYWORD_MIN_SCORE]
+    if len(hits) < min(k, len(docs)):
+        return None
+
+    # 점수가 같으면 rules.json 순서를 유지한다
+    hits.sort(key=lambda i: (-scores[i], i))
+    return [docs[i] for i in hits[:k]]
+
+
 def rebuild_rules_index(rules: List[Dict[str, Any]]) -> int:
     """
-    Chroma 컬렉션을 현재 rules.json 내용으로 재구축한다.
-    - MVP+: 전체 삭제 후 재삽입 방식(규모가 커지면 upsert 전략으로 교체).
+    Chroma 컬렉션을 현재 rules.json 내용과 동기화한다.
+    - rule_id를 문서 id로 upsert하고, content_hash가 바뀐 규칙만 다시 임베딩한다.
+    - rules.json에서 사라진 규칙(및 id가 rule_id가 아닌 예전 문서)은 삭제한다.
+    - 키워드 검색용 BM25 인덱스(keyword_index.pkl)도 함께 다시 만든다.
     """
     vs = get_rules_vectorstore()
-    vs.delete_collection()
-    vs = get_rules_vectorstore()
     docs = rules_to_documents(rules)
-    vs.add_documents(docs)
+
+    existing = vs.get(include=["metadatas"])
+    stored_hashes = {
+        doc_id: (meta or {}).get("content_hash")
+        for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+    }
+
+    current_ids = {d.metadata["rule_id"] for d in docs}
+    removed_ids = [doc_id for doc_id in stored_hashes if doc_id not in current_ids]
+    changed = [d for d in docs if stored_hashes.get(d.metadata["rule_id"]) != d.metadata["content_hash"]]
+
+    if removed_ids:
+        vs.delete(ids=removed_ids)
+    if changed:
+        vs.add_documents(changed, ids=[d.metadata["rule_id"] for d in changed])
     vs.persist()
+    _save_keyword_index(rules, docs)
     return len(docs)
 
 
 def search_rules(query: str, k: int = 5) -> List[Dict[str, Any]]:
+    """
+    규칙을 검색한다.
+    - 질의 단어가 규칙 title/description과 충분히 맞으면(BM25 점수가 KEYWORD_MIN_SCORE 이상) 임베딩을 호출하지 않는다.
+    - 키워드로 충분히 찾지 못한 경우에만 Chroma similarity_search를 사용한다.
+    """
+    hits = _keyword_search(query, k)
+    if hits is not None:
+        return hits
+
     vs = get_rules_vectorstore()
     docs = vs.similarity_search(query, k=k)
     out = []